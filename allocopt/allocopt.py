@@ -1,10 +1,15 @@
 # Copyright 2023-, Semiotic AI, Inc.
 # SPDX-License-Identifier: Apache-2.0
 
+import os
 from enum import Enum
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Optional, Sequence
 
-from allocopt.grt_utils import grt_decimal_to_wei
+# Default location of the sysimage produced by build_sysimage.py, at the
+# repository root (next to the `allocopt` package).
+_DEFAULT_SYSIMAGE_PATH = Path(__file__).parent.parent / "allocopt.so"
 
 
 class OptMode(Enum):
@@ -23,118 +28,73 @@ class OptMode(Enum):
     OPTIMAL = "optimal"
 
 
-def allocopt(
-    indexer_address: str,
-    grt_gas_per_allocation: float,
-    allocation_lifetime: int,
-    thegraph_network_subgraph_endpoint: str,
-    max_new_allocations: int,
-    min_signal: int,
-    opt_mode: OptMode = OptMode.OPTIMAL,
-    whitelist: Optional[Sequence[str]] = None,
-    blacklist: Optional[Sequence[str]] = None,
-    pinnedlist: Optional[Sequence[str]] = None,
-    frozenlist: Optional[Sequence[str]] = None,
-) -> Dict[str, int]:
-    """Generate optimized allocations using AllocationOpt.jl
+# Precomputed mode-to-config-string mapping, so the per-call config build does
+# a plain dict lookup instead of going through the Enum `.value` descriptor.
+_OPT_MODE_VALUES = {mode: mode.value for mode in OptMode}
 
-    Args:
-        indexer_address (str): Address of the indexer to optimize.
-        grt_gas_per_allocation (float): Estimated gas cost of opening an allocation, in
-            GRT.
-        allocation_lifetime (int): The number of epochs for which these allocations
-            would be open. An allocation earns indexing rewards for up to 28 epochs.
-        thegraph_network_subgraph_endpoint (str): URL to a Graph Network subgraph
-            GraphQL endpoint.
-        max_new_allocations (int): The maximum number of new allocations you would like
-            optimize.
-        min_signal (int): The minimum amount of signal you would like to allocate to
-            each subgraph.
-        opt_mode (OptMode, optional): allocation-optimizer optimizer mode. Defaults to
-            `OptMode.OPTIMAL`.
-        whitelist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
-            whitelist. Defaults to None.
-        blacklist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
-            blacklist. Defaults to None.
-        pinnedlist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
-            pin. Defaults to None.
-        frozenlist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
-            freeze. Defaults to None.
+
+@lru_cache(maxsize=1)
+def _bootstrap():
+    """Install and load AllocationOpt.jl, and define `opt_fun`, exactly once.
+
+    `Pkg.add` and `seval` are expensive (registry resolution, parsing, type
+    inference), so they are kept out of the per-call path of `allocopt`. The
+    `lru_cache` guard makes repeated calls free after the first one.
 
     Returns:
-        Dict[str, int]: Dictionary of subgraph deployments and amount to allocate in
-            GRT wei.
+        The juliacall `Main` module, with `opt_fun` defined in it.
     """
-    # Create empty arrays for the input lists if they are `None`
-    if not whitelist:
-        whitelist = []
-    if not blacklist:
-        blacklist = []
-    if not pinnedlist:
-        pinnedlist = []
-    if not frozenlist:
-        frozenlist = []
+    # Use the custom sysimage built by build_sysimage.py, if available. The
+    # environment variable has to be set before juliacall is first imported.
+    sysimage = os.environ.get("PYALLOCOPT_SYSIMAGE", str(_DEFAULT_SYSIMAGE_PATH))
+    if os.path.isfile(sysimage):
+        os.environ.setdefault("PYTHON_JULIACALL_SYSIMAGE", sysimage)
 
     # Import Julia modules at the last moment to not make importing pyallocopt slow.
     from juliacall import Main as jl
-    from juliacall import convert
 
-    # Make sure AllocationOpt.jl is installed
-    jl.Pkg.add(
-        url="https://github.com/semiotic-ai/SemioticOpt.jl",
-        rev="8b3b127270a15402427883c577425d5a96c0fe98",  # v2.4.2
-    )
-    jl.Pkg.add(
-        url="https://github.com/semiotic-ai/TheGraphData.jl",
-        rev="2d674d72a541fae838c60417c92fb56fe1d92602",
-    )
-    jl.Pkg.add(
-        url="https://github.com/graphprotocol/allocation-optimizer.git",
-        rev="ba26e3734d77fcf120b7f080469226896e44fd09",
-    )
+    # Make sure AllocationOpt.jl is installed. `Pkg.add` with a git url contacts
+    # the package server and re-resolves the dependency graph even when the
+    # pinned revs are already in the environment, so only pay that cost once,
+    # when AllocationOpt.jl is actually missing.
+    if jl.seval('Base.find_package("AllocationOpt") === nothing'):
+        jl.Pkg.add(
+            url="https://github.com/semiotic-ai/SemioticOpt.jl",
+            rev="8b3b127270a15402427883c577425d5a96c0fe98",  # v2.4.2
+        )
+        jl.Pkg.add(
+            url="https://github.com/semiotic-ai/TheGraphData.jl",
+            rev="2d674d72a541fae838c60417c92fb56fe1d92602",
+        )
+        jl.Pkg.add(
+            url="https://github.com/graphprotocol/allocation-optimizer.git",
+            rev="ba26e3734d77fcf120b7f080469226896e44fd09",
+        )
 
     # Load the AllocationOpt.jl
     jl.seval("using AllocationOpt")
 
-    # Cast input params into the correct Julia types.
-    whitelist = convert(jl.Array[jl.String], whitelist)
-    blacklist = convert(jl.Array[jl.String], blacklist)
-    pinnedlist = convert(jl.Array[jl.String], pinnedlist)
-    frozenlist = convert(jl.Array[jl.String], frozenlist)
-
-    # Create a config dictionary
-    config = convert(
-        jl.Dict[jl.String, jl.Any],
-        {
-            "id": indexer_address,
-            "network_subgraph_endpoint": thegraph_network_subgraph_endpoint,
-            "whitelist": whitelist,
-            "blacklist": blacklist,
-            "frozenlist": frozenlist,
-            "pinnedlist": pinnedlist,
-            "allocation_lifetime": allocation_lifetime,
-            "gas": grt_gas_per_allocation,
-            "min_signal": min_signal,
-            "max_allocations": max_new_allocations,
-            "num_reported_options": 1,
-            "indexer_url": indexer_address,
-            "verbose": True,
-            "opt_mode": opt_mode.value,
-            "readdir": None,
-        },
-    )
-
     jl.seval(
         """
         begin
         using AllocationOpt: read, allocatablesubgraphs, pinned, availablestake, frozen, stake, signal, newtokenissuance, deniedzeroixs, optimize, bestprofitpernz, sortprofits!, strategydict, writejson, execute, groupunique, fudgefactor
-        function opt_fun(config::Dict)
+        using PythonCall: pylist
+        function opt_fun(config::Dict, verbose::Bool=false)
+            # Pull the scalar settings out of the Dict{String, Any} once; the
+            # NamedTuple fields are concretely typed, so later uses are plain
+            # field loads instead of repeated string hashing and Any unboxing.
+            c = (
+                max_allocations = Int(config["max_allocations"]),
+                gas = Float64(config["gas"]),
+                num_reported_options = Int(config["num_reported_options"]),
+            )
+
             # Read data
             i, a, s, n = read(config)
-             
+
             # Get the subgraphs on which we can allocate
             fs = allocatablesubgraphs(s, config)
-             
+
             # Get the indexer stake
             pinnedvec = pinned(fs, config)
             σpinned = pinnedvec |> sum
@@ -157,50 +117,210 @@ def allocopt(
             rixs = deniedzeroixs(fs)
 
             # Get max number of allocations
-            K = min(config["max_allocations"], length(rixs))
+            K = min(c.max_allocations, length(rixs))
 
             # Get gas cost in GRT
-            g = config["gas"]
+            g = c.gas
 
-            # Get optimal values
-            config["verbose"] && @info "Optimizing"
+            # Get optimal values. xs/nonzeros/profitmatrix are freshly
+            # allocated inside AllocationOpt.optimize on every call; reusing
+            # buffers across calls would need an in-place optimize! upstream.
+            verbose && @info "Optimizing"
             xs, nonzeros, profitmatrix = optimize(Ω, ψ, σ, K, Φ, Ψ, g, rixs, config)
 
             # Add the pinned stake back in
             xs .= xs .+ pinnedvec
 
-            # Ensure that the indexer stake is not exceeded
+            # Ensure that the indexer stake is not exceeded. Each strategy is a
+            # column of xs, so summing column by column walks the matrix in
+            # memory order without materializing the 1×K sum(xs; dims=1) row.
             σmax = σ + σpinned
-            for x in sum(xs; dims=1)
+            for j in axes(xs, 2)
+                x = @views sum(xs[:, j])
                 isnan(x) ||
                     x ≤ σmax ||
                     error("Tried to allocate more stake than is available by $(x - σmax)")
             end
 
             # Write the result values
-            # Group by unique number of nonzeros
-            groupixs = groupunique(nonzeros)
-            groupixs = Dict(keys(groupixs) .=> values(groupixs))
-
-            config["verbose"] && @info "Writing results report"
-            # For each set of nonzeros, find max profit (should be the same other than rounding)
-            popts = bestprofitpernz.(values(groupixs), Ref(profitmatrix)) |> sortprofits!
-            nreport = min(config["num_reported_options"], length(popts))
+            verbose && @info "Writing results report"
+            if c.num_reported_options == 1
+                # Only the single best strategy is reported (the pyallocopt
+                # default), so take the best profit over all strategies
+                # directly instead of grouping and sorting.
+                popts = [bestprofitpernz(collect(eachindex(nonzeros)), profitmatrix)]
+            else
+                # Group by unique number of nonzeros
+                groupixs = groupunique(nonzeros)
+                groupixs = Dict(keys(groupixs) .=> values(groupixs))
+
+                # For each set of nonzeros, find max profit (should be the same other than rounding)
+                popts = bestprofitpernz.(values(groupixs), Ref(profitmatrix)) |> sortprofits!
+            end
+            nreport = min(c.num_reported_options, length(popts))
 
             # Create JSON string
             strategies =
                 strategydict.(popts[1:nreport], Ref(xs), Ref(nonzeros), Ref(fs), Ref(profitmatrix))
 
-            return strategies
+            length(strategies) == 1 || error("Expected only one strategy to be returned")
+
+            # Return plain (deploymentID, allocationAmount) pairs so that the
+            # Python side iterates one flat array instead of doing two dict
+            # lookups through the Julia boundary per allocation. Amounts are
+            # scaled to whole wei here, as BigInt (exact, converts straight to
+            # a Python int), so Python needs no Decimal arithmetic at all.
+            # pylist converts the whole result to native Python objects in one
+            # shot, so iterating it in Python crosses the boundary zero times.
+            towei(x) = round(BigInt, parse(BigFloat, string(x)) * big(10)^18)
+            return pylist([
+                (String(a["deploymentID"]), towei(a["allocationAmount"])) for
+                a in strategies[1]["allocations"]
+            ])
         end
         end
     """.strip()
     )
 
-    res = jl.opt_fun(config)
+    # Warm up type inference of the whole opt_fun call graph now, so the first
+    # real allocopt call doesn't stall for seconds on the compiler.
+    jl.seval("precompile(opt_fun, (Dict{String, Any}, Bool))")
+
+    return jl
+
+
+@lru_cache(maxsize=1)
+def _julia_config():
+    """Create the persistent Julia config dict for `opt_fun`, exactly once.
+
+    Converting a fresh Python dict (including four `Vector{String}` fields) to
+    Julia on every `allocopt` call is per-call garbage; instead one
+    `Dict{String, Any}` and its list buffers are allocated here and mutated in
+    place by `_update_config`.
+
+    Returns:
+        The Julia `Dict{String, Any}` config object.
+    """
+    jl = _bootstrap()
 
-    assert len(res) == 1, "Expected only one strategy to be returned"
+    config = jl.seval("Dict{String, Any}()")
+    for key in ("whitelist", "blacklist", "pinnedlist", "frozenlist"):
+        config[key] = jl.seval("String[]")
+    # Constant fields; `allocopt` always reports a single strategy and reads
+    # live data from the network subgraph.
+    config["num_reported_options"] = 1
+    config["readdir"] = None
+
+    return config
+
+
+# Config fields backed by the persistent `Vector{String}` buffers.
+_LIST_FIELDS = ("whitelist", "blacklist", "pinnedlist", "frozenlist")
+
+# Last contents written to each list buffer, so that stable lists (a pinnedlist
+# that doesn't change between service-loop iterations, for example) are not
+# re-converted to Julia on every call.
+_last_list_values: Dict[str, tuple] = {}
+
+
+def _update_config(config, **fields) -> None:
+    """Update the persistent Julia config dict in place.
+
+    List fields are written into the persistent `Vector{String}` buffers
+    already held by the config (via `empty!`/`append!`), so a `None` or empty
+    list costs no Julia allocation at all, and a list whose contents are
+    unchanged since the previous call is skipped entirely; everything else is
+    assigned directly.
+
+    Args:
+        config: The Julia config dict from `_julia_config`.
+        **fields: Config fields to update.
+    """
+    jl = _bootstrap()
+    from juliacall import convert
+
+    for key, value in fields.items():
+        if key in _LIST_FIELDS:
+            value = tuple(value) if value else ()
+            if _last_list_values.get(key) == value:
+                continue
+            buffer = config[key]
+            jl.empty_b(buffer)
+            if value:
+                jl.append_b(buffer, convert(jl.Vector[jl.String], list(value)))
+            _last_list_values[key] = value
+        else:
+            config[key] = value
+
+
+def allocopt(
+    indexer_address: str,
+    grt_gas_per_allocation: float,
+    allocation_lifetime: int,
+    thegraph_network_subgraph_endpoint: str,
+    max_new_allocations: int,
+    min_signal: int,
+    opt_mode: OptMode = OptMode.OPTIMAL,
+    whitelist: Optional[Sequence[str]] = None,
+    blacklist: Optional[Sequence[str]] = None,
+    pinnedlist: Optional[Sequence[str]] = None,
+    frozenlist: Optional[Sequence[str]] = None,
+    verbose: bool = False,
+) -> Dict[str, int]:
+    """Generate optimized allocations using AllocationOpt.jl
+
+    Args:
+        indexer_address (str): Address of the indexer to optimize.
+        grt_gas_per_allocation (float): Estimated gas cost of opening an allocation, in
+            GRT.
+        allocation_lifetime (int): The number of epochs for which these allocations
+            would be open. An allocation earns indexing rewards for up to 28 epochs.
+        thegraph_network_subgraph_endpoint (str): URL to a Graph Network subgraph
+            GraphQL endpoint.
+        max_new_allocations (int): The maximum number of new allocations you would like
+            optimize.
+        min_signal (int): The minimum amount of signal you would like to allocate to
+            each subgraph.
+        opt_mode (OptMode, optional): allocation-optimizer optimizer mode. Defaults to
+            `OptMode.OPTIMAL`.
+        whitelist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
+            whitelist. Defaults to None.
+        blacklist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
+            blacklist. Defaults to None.
+        pinnedlist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
+            pin. Defaults to None.
+        frozenlist (Optional[Sequence[str]], optional): List of subgraph IPFS hashes to
+            freeze. Defaults to None.
+        verbose (bool, optional): Log the optimizer's progress. Defaults to False.
+
+    Returns:
+        Dict[str, int]: Dictionary of subgraph deployments and amount to allocate in
+            GRT wei.
+    """
+    # Set up Julia (no-op after the first call).
+    jl = _bootstrap()
+
+    # Update the persistent config dictionary in place.
+    config = _julia_config()
+    _update_config(
+        config,
+        id=indexer_address,
+        network_subgraph_endpoint=thegraph_network_subgraph_endpoint,
+        whitelist=whitelist,
+        blacklist=blacklist,
+        pinnedlist=pinnedlist,
+        frozenlist=frozenlist,
+        allocation_lifetime=allocation_lifetime,
+        gas=grt_gas_per_allocation,
+        min_signal=min_signal,
+        max_allocations=max_new_allocations,
+        indexer_url=indexer_address,
+        opt_mode=_OPT_MODE_VALUES[opt_mode],
+        verbose=verbose,
+    )
 
-    res = res[0]["allocations"]
+    # `res` is already a native Python list of (deploymentID, wei) tuples, so
+    # building the dict stays entirely in CPython.
+    res = jl.opt_fun(config, verbose)
 
-    return {e["deploymentID"]: grt_decimal_to_wei(e["allocationAmount"]) for e in res}
+    return dict(res)
@@ -9,6 +9,12 @@ _GRT_DECIMAL_CONTEXT = Context(
 )
 _GRT_DECIMALS = Decimal(18)
 _GRT_DECIMAL_FACTOR = Decimal(10) ** _GRT_DECIMALS
+# Quantization target for whole-wei values, precomputed so that
+# `grt_decimal_to_wei` does not redo the 78-digit `1 / _GRT_DECIMAL_FACTOR`
+# division on every call.
+_GRT_QUANTIZER = Decimal("1E-18")
+# Plain-int scale factor for the integer fast path of `grt_decimal_to_wei`.
+_WEI_PER_GRT = 10**18
 
 
 @contextmanager
@@ -43,22 +49,51 @@ def grt_wei_to_decimal(grt_wei: int) -> Decimal:
     return grt_decimal
 
 
+def _grt_decimal_to_wei_nocxt(
+    grt_decimal: Decimal | float | int, rounding: str | None = None
+) -> int:
+    """`grt_decimal_to_wei` without the GRT Decimal context switch.
+
+    For batch conversions, enter `_grt_decimal_context()` once around the whole
+    batch and call this instead of `grt_decimal_to_wei`, which would otherwise
+    swap the thread-local Decimal context on every element.
+
+    Args:
+        grt_decimal (Decimal | float | int): GRT value.
+        rounding (str | None, optional): Rounding, as defined in Decimal (Python
+            stdlib). Defaults to the current Decimal context setting.
+
+    Returns:
+        int: GRT wei value.
+    """
+    # Whole-GRT integers scale exactly with plain int arithmetic; only floats
+    # need the expensive repr-based Decimal construction.
+    if isinstance(grt_decimal, int):
+        return grt_decimal * _WEI_PER_GRT
+    if not isinstance(grt_decimal, Decimal):
+        grt_decimal = Decimal(grt_decimal)
+    # `scaleb` shifts the exponent in O(1) instead of undoing the quantize with
+    # a 78-digit multiplication by _GRT_DECIMAL_FACTOR.
+    return int(
+        grt_decimal.quantize(_GRT_QUANTIZER, rounding=rounding).scaleb(_GRT_DECIMALS)
+    )
+
+
 def grt_decimal_to_wei(
-    grt_decimal: Decimal | float, rounding: str | None = None
+    grt_decimal: Decimal | float | int, rounding: str | None = None
 ) -> int:
-    """Converts a Decimal (preferred) or float GRT value to integer GRT wei.
+    """Converts a Decimal (preferred), float or int GRT value to integer GRT wei.
 
     Args:
-        grt_decimal (Decimal | float): GRT value.
+        grt_decimal (Decimal | float | int): GRT value.
         rounding (str | None, optional): Rounding, as defined in Decimal (Python
             stdlib). Defaults to the current Decimal context setting.
 
     Returns:
         int: GRT wei value.
     """
+    # Integers never need the GRT Decimal context at all.
+    if isinstance(grt_decimal, int):
+        return grt_decimal * _WEI_PER_GRT
     with _grt_decimal_context():
-        grt_wei = int(
-            Decimal(grt_decimal).quantize(1 / _GRT_DECIMAL_FACTOR, rounding=rounding)
-            * _GRT_DECIMAL_FACTOR
-        )
-    return grt_wei
+        return _grt_decimal_to_wei_nocxt(grt_decimal, rounding=rounding)
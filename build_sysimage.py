@@ -0,0 +1,47 @@
+# Copyright 2023-, Semiotic AI, Inc.
+# SPDX-License-Identifier: Apache-2.0
+
+"""Build a custom Julia sysimage for pyallocopt.
+
+The first `allocopt` call pays the full cost of `using AllocationOpt` plus
+JIT-compilation of `opt_fun`. Baking AllocationOpt.jl and its dependencies into
+a native sysimage cuts that cold start to well under a second. Run this script
+once (it takes several minutes); `allocopt` picks the sysimage up automatically
+on subsequent runs, or point the `PYALLOCOPT_SYSIMAGE` environment variable at
+it explicitly.
+"""
+
+from pathlib import Path
+
+from allocopt.allocopt import _DEFAULT_SYSIMAGE_PATH, _bootstrap
+
+_PRECOMPILE_FILE = Path(__file__).parent / "precompile_run.jl"
+
+
+def build_sysimage(sysimage_path: Path = _DEFAULT_SYSIMAGE_PATH) -> None:
+    """Build the pyallocopt sysimage with PackageCompiler.jl.
+
+    Args:
+        sysimage_path (Path, optional): Where to write the sysimage. Defaults to
+            `allocopt.so` next to the `allocopt` package.
+    """
+    # _bootstrap installs AllocationOpt.jl and its dependencies into the active
+    # Julia project, which PackageCompiler needs to resolve them.
+    jl = _bootstrap()
+
+    from juliacall import convert
+
+    jl.Pkg.add("PackageCompiler")
+    jl.seval("using PackageCompiler")
+    # Convert explicitly: juliacall would pass a Python list as a PyList{Py}
+    # wrapper, which doesn't match create_sysimage's typed packages parameter.
+    jl.PackageCompiler.create_sysimage(
+        convert(jl.Vector[jl.String], ["AllocationOpt", "SemioticOpt", "TheGraphData"]),
+        sysimage_path=str(sysimage_path),
+        precompile_execution_file=str(_PRECOMPILE_FILE),
+    )
+    print(f"Sysimage written to {sysimage_path}")
+
+
+if __name__ == "__main__":
+    build_sysimage()
@@ -0,0 +1,38 @@
+# Copyright 2023-, Semiotic AI, Inc.
+# SPDX-License-Identifier: Apache-2.0
+
+# Precompile workload executed by PackageCompiler when building the pyallocopt
+# sysimage (see build_sysimage.py). It bakes in native code for the
+# AllocationOpt entry points that opt_fun in allocopt/allocopt.py calls.
+
+using AllocationOpt
+using AllocationOpt: read, optimize, bestprofitpernz, groupunique
+
+# A tiny synthetic config matching the one built by allocopt(). The
+# data-dependent entry points would need network access to actually run at
+# build time, so they get precompile hints against this config's concrete
+# type instead of being executed.
+config = Dict{String,Any}(
+    "id" => "0x0000000000000000000000000000000000000000",
+    "network_subgraph_endpoint" => "http://localhost",
+    "whitelist" => String[],
+    "blacklist" => String[],
+    "frozenlist" => String[],
+    "pinnedlist" => String[],
+    "allocation_lifetime" => 28,
+    "gas" => 100.0,
+    "min_signal" => 100,
+    "max_allocations" => 10,
+    "num_reported_options" => 1,
+    "verbose" => false,
+    "readdir" => nothing,
+)
+
+precompile(read, (typeof(config),))
+precompile(optimize, (Vector{Float64}, Vector{Float64}, Float64, Int, Float64,
+                      Float64, Float64, Vector{Int}, typeof(config)))
+
+# The pure-compute helpers can be executed outright on tiny synthetic inputs,
+# compiling them for the exact argument types opt_fun uses.
+groupunique([1, 2, 2, 1])
+bestprofitpernz([1, 2], [1.0 2.0; 3.0 4.0])